@@ -3,10 +3,19 @@ import re
 import pdfplumber
 import os
 import sys
+import mmap
+import hashlib
+import importlib.util
 import threading
+import time
+import multiprocessing
+from collections import deque
+from itertools import chain
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import customtkinter as ctk
 from datetime import datetime
 import email
+import email.policy
 import tempfile
 import shutil
 from pathlib import Path
@@ -15,17 +24,64 @@ from pathlib import Path
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("green")
 
+# Patterns used while parsing remittance PDFs, compiled once
+_STORE_HEADER_PATTERN = re.compile(r'(.*?)\s+t/a\s+-\s+(.*?)$')
+# A transaction line ending in a numeric total ('.50', '12.34', '-1,234.56')
+_TRANSACTION_PATTERN = re.compile(
+    r'(?P<date>\d{1,2}-\w{3}-\d{4})\s+(?P<desc>.*?)\s+(?P<amount>[+-]?[\d,]+\.\d{2})'
+    r'\s+(?P<total>\d*\.\d{2}|[+-]?[\d,]+\.\d{2})$'
+)
+# Any other transaction line; only tried when the pattern above fails since
+# it splits description and amount differently on lines with extra numbers
+_TRANSACTION_FALLBACK_PATTERN = re.compile(
+    r'(?P<date>\d{1,2}-\w{3}-\d{4})\s+(?P<desc>.*?)\s+(?P<amount>[+-]?[\d,]+\.\d{2})\s+(?P<total>.*?)$'
+)
+_NUMBER_PATTERN = re.compile(r'[+-]?[\d,]+\.\d+')
+
+# Columns produced by PDFDataExtractor.parse_store_transactions
+_TRANSACTION_COLUMNS = ('Store', 'Date', 'Description', 'Amount', 'Running_Total', 'Transaction_Type')
+
+# Streaming Excel writers keep one temp file open per worksheet until the
+# workbook is closed. Leave this many descriptors for everything else
+# (worker pool pipes, the output file, Tk).
+_FD_HEADROOM = 128
+# Open file limit of the Windows C runtime, which has no RLIMIT_NOFILE
+_WINDOWS_FD_LIMIT = 8192
+
 class EmailPDFProcessor:
     def __init__(self):
         self.temp_pdf_folder = None
+        self._staged_lock = threading.Lock()
+        # Filenames taken in each output folder, so picking a unique name
+        # does not need a stat per candidate
+        self._known_filenames = {}
+        # Staged PDFs not yet given their final name:
+        # staging path -> (attachment filename, content digest)
+        self._staged_pdfs = {}
+    
+    def save_pdf(self, output_folder, filename, pdf_data):
+        """Write PDF data to a staging file and return its path
+        
+        Emails are extracted on several threads, so final names are handed
+        out afterwards, in email order, by extract_pdfs_from_emails.
+        """
+        digest = hashlib.blake2b(pdf_data, digest_size=16).digest()
+        fd, staged_path = tempfile.mkstemp(suffix='.pdf', prefix='.staged_', dir=output_folder)
+        with open(fd, 'wb') as pdf_file:
+            pdf_file.write(pdf_data)
+        
+        with self._staged_lock:
+            self._staged_pdfs[staged_path] = (filename, digest)
+        return staged_path
         
     def extract_pdfs_from_eml(self, eml_file_path, output_folder):
         """Extract PDFs from .eml email files"""
         pdfs_found = []
         
         try:
+            # Parse straight from the file instead of reading it into memory first
             with open(eml_file_path, 'rb') as f:
-                msg = email.message_from_bytes(f.read())
+                msg = email.message_from_binary_file(f, policy=email.policy.default)
             
             if msg.is_multipart():
                 for part in msg.walk():
@@ -34,22 +90,14 @@ class EmailPDFProcessor:
                         if filename and filename.lower().endswith('.pdf'):
                             pdf_data = part.get_payload(decode=True)
                             if pdf_data:
-                                final_filename = self.get_unique_filename(output_folder, filename)
-                                output_path = os.path.join(output_folder, final_filename)
-                                with open(output_path, 'wb') as pdf_file:
-                                    pdf_file.write(pdf_data)
-                                pdfs_found.append(output_path)
+                                pdfs_found.append(self.save_pdf(output_folder, filename, pdf_data))
             else:
                 content_type = msg.get_content_type()
                 if content_type == 'application/pdf':
                     filename = msg.get_filename() or 'attachment.pdf'
                     pdf_data = msg.get_payload(decode=True)
                     if pdf_data:
-                        final_filename = self.get_unique_filename(output_folder, filename)
-                        output_path = os.path.join(output_folder, final_filename)
-                        with open(output_path, 'wb') as pdf_file:
-                            pdf_file.write(pdf_data)
-                        pdfs_found.append(output_path)
+                        pdfs_found.append(self.save_pdf(output_folder, filename, pdf_data))
         
         except Exception as e:
             raise Exception(f"Error processing {os.path.basename(eml_file_path)}: {str(e)}")
@@ -61,6 +109,11 @@ class EmailPDFProcessor:
         pdfs_found = []
         
         try:
+            # Skip the full OLE parse for messages without any PDF in them;
+            # attachment data is stored as-is, so a PDF's header is in the file
+            if not self.contains_pdf_signature(msg_file_path):
+                return pdfs_found
+            
             # Try extract-msg library first
             try:
                 import extract_msg
@@ -74,65 +127,87 @@ class EmailPDFProcessor:
                         filename = attachment.shortFilename
                     
                     if filename and filename.lower().endswith('.pdf'):
-                        final_filename = self.get_unique_filename(output_folder, filename)
-                        output_path = os.path.join(output_folder, final_filename)
-                        with open(output_path, 'wb') as pdf_file:
-                            pdf_file.write(attachment.data)
-                        pdfs_found.append(output_path)
+                        pdfs_found.append(self.save_pdf(output_folder, filename, attachment.data))
                 
                 msg.close()
             
             except ImportError:
-                # Alternative method without extract-msg
-                with open(msg_file_path, 'rb') as f:
-                    content = f.read()
-                
-                pdf_start = b'%PDF-'
-                pdf_end = b'%%EOF'
-                start_pos = 0
-                pdf_count = 0
-                
-                while True:
-                    pdf_start_pos = content.find(pdf_start, start_pos)
-                    if pdf_start_pos == -1:
-                        break
-                    
-                    pdf_end_pos = content.find(pdf_end, pdf_start_pos)
-                    if pdf_end_pos == -1:
-                        break
-                    
-                    pdf_end_pos += len(pdf_end)
-                    pdf_data = content[pdf_start_pos:pdf_end_pos]
-                    
-                    pdf_count += 1
-                    filename = f"extracted_pdf_{pdf_count}.pdf"
-                    final_filename = self.get_unique_filename(output_folder, filename)
-                    
-                    output_path = os.path.join(output_folder, final_filename)
-                    with open(output_path, 'wb') as pdf_file:
-                        pdf_file.write(pdf_data)
-                    pdfs_found.append(output_path)
+                # Alternative method without extract-msg. Scan a read-only
+                # memory map so the file is never copied into memory in full;
+                # only the PDFs found are sliced out.
+                with open(msg_file_path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    pdf_start = b'%PDF-'
+                    pdf_end = b'%%EOF'
+                    start_pos = 0
+                    pdf_count = 0
                     
-                    start_pos = pdf_end_pos
+                    while True:
+                        pdf_start_pos = content.find(pdf_start, start_pos)
+                        if pdf_start_pos == -1:
+                            break
+                        
+                        pdf_end_pos = content.find(pdf_end, pdf_start_pos)
+                        if pdf_end_pos == -1:
+                            break
+                        
+                        pdf_end_pos += len(pdf_end)
+                        pdf_count += 1
+                        filename = f"extracted_pdf_{pdf_count}.pdf"
+                        
+                        # Write straight from the map without copying the PDF
+                        # into a bytes object; the view is released before the
+                        # map is closed
+                        with memoryview(content)[pdf_start_pos:pdf_end_pos] as pdf_data:
+                            pdfs_found.append(self.save_pdf(output_folder, filename, pdf_data))
+                        
+                        start_pos = pdf_end_pos
         
         except Exception as e:
             raise Exception(f"Error processing {os.path.basename(msg_file_path)}: {str(e)}")
         
         return pdfs_found
     
+    @staticmethod
+    def contains_pdf_signature(file_path):
+        """Check whether the file contains a PDF header anywhere"""
+        # mmap cannot map an empty file, which has no PDFs anyway
+        if os.path.getsize(file_path) == 0:
+            return False
+        
+        with open(file_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return content.find(b'%PDF-') != -1
+    
     def get_unique_filename(self, output_folder, filename):
         """Generate unique filename if file already exists"""
+        known = self._known_filenames.get(output_folder)
+        if known is None:
+            # Seed from disk once per folder; normcase matches Windows' case-insensitive names
+            known = {os.path.normcase(name) for name in os.listdir(output_folder)}
+            self._known_filenames[output_folder] = known
+        
         base_name = Path(filename).stem
         extension = Path(filename).suffix
         counter = 1
         final_filename = filename
         
-        while os.path.exists(os.path.join(output_folder, final_filename)):
+        while os.path.normcase(final_filename) in known:
             final_filename = f"{base_name}_{counter}{extension}"
             counter += 1
         
         return final_filename
     
+    def extract_pdfs_from_email_file(self, file_path):
+        """Extract PDFs from a single .eml or .msg file"""
+        file_extension = Path(file_path).suffix.lower()
+        
+        if file_extension == '.eml':
+            return self.extract_pdfs_from_eml(file_path, self.temp_pdf_folder)
+        elif file_extension == '.msg':
+            return self.extract_pdfs_from_msg(file_path, self.temp_pdf_folder)
+        return []
+    
     def extract_pdfs_from_emails(self, input_folder, recursive=True, update_callback=None):
         """Extract all PDFs from email files in the input folder"""
         # Create temporary folder for extracted PDFs
@@ -157,40 +232,76 @@ class EmailPDFProcessor:
         if update_callback:
             update_callback(f"Found {total_files} email files to process")
         
-        # Process each email file
-        for i, file_path in enumerate(email_files, 1):
-            filename = os.path.basename(file_path)
-            file_extension = Path(file_path).suffix.lower()
-            
-            if update_callback:
-                update_callback(f"Processing email {i}/{total_files}: {filename}")
-            
-            pdfs_found = []
+        # Process email files concurrently; the work is dominated by file I/O
+        results = [None] * total_files
+        max_workers = min(8, (os.cpu_count() or 1) * 2)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.extract_pdfs_from_email_file, file_path): index
+                for index, file_path in enumerate(email_files)
+            }
             
-            try:
-                if file_extension == '.eml':
-                    pdfs_found = self.extract_pdfs_from_eml(file_path, self.temp_pdf_folder)
-                elif file_extension == '.msg':
-                    pdfs_found = self.extract_pdfs_from_msg(file_path, self.temp_pdf_folder)
+            # Report progress in completion order from this thread only
+            for i, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                filename = os.path.basename(email_files[index])
                 
-                if pdfs_found:
-                    extracted_pdfs.extend(pdfs_found)
-                    if update_callback:
-                        update_callback(f"  → Extracted {len(pdfs_found)} PDF(s)")
+                if update_callback:
+                    update_callback(f"Processed email {i}/{total_files}: {filename}")
                 
-                processed_emails += 1
+                try:
+                    pdfs_found = future.result()
+                    results[index] = pdfs_found
+                    
+                    if pdfs_found and update_callback:
+                        update_callback(f"  → Extracted {len(pdfs_found)} PDF(s)")
+                    
+                    processed_emails += 1
+                    
+                except Exception as e:
+                    if update_callback:
+                        update_callback(f"  → Error: {str(e)}")
+        
+        # Name the extracted PDFs in email order, so the same emails always
+        # give the same names, and drop later copies of a PDF already
+        # attached to an earlier email (forwards, CCs)
+        seen_digests = set()
+        duplicates = 0
+        for pdfs_found in results:
+            for staged_path in pdfs_found or ():
+                filename, digest = self._staged_pdfs.pop(staged_path)
+                if digest in seen_digests:
+                    duplicates += 1
+                    try:
+                        os.remove(staged_path)
+                    except OSError:
+                        pass
+                    continue
+                seen_digests.add(digest)
                 
-            except Exception as e:
-                if update_callback:
-                    update_callback(f"  → Error: {str(e)}")
+                final_filename = self.get_unique_filename(self.temp_pdf_folder, filename)
+                self._known_filenames[self.temp_pdf_folder].add(os.path.normcase(final_filename))
+                pdf_path = os.path.join(self.temp_pdf_folder, final_filename)
+                os.replace(staged_path, pdf_path)
+                extracted_pdfs.append(pdf_path)
+        
+        # Emails that failed part way leave staged PDFs behind; the temp
+        # folder cleanup removes the files
+        self._staged_pdfs.clear()
         
         if update_callback:
+            if duplicates:
+                update_callback(f"Skipped {duplicates} duplicate PDF(s)")
             update_callback(f"Extraction complete: {len(extracted_pdfs)} PDFs from {processed_emails} emails")
         
         return extracted_pdfs
     
     def cleanup_temp_folder(self):
         """Clean up temporary PDF folder"""
+        if self.temp_pdf_folder:
+            self._known_filenames.pop(self.temp_pdf_folder, None)
+        
         if self.temp_pdf_folder and os.path.exists(self.temp_pdf_folder):
             try:
                 shutil.rmtree(self.temp_pdf_folder)
@@ -198,6 +309,20 @@ class EmailPDFProcessor:
                 pass
 
 class PDFDataExtractor:
+    @staticmethod
+    def iter_page_texts(pdf_path):
+        """Yield the plain text of each page"""
+        # pdfplumber rebuilds lines from glyph positions, so tables drawn
+        # column by column still come out as one transaction per line
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ''
+                # Drop the page's cached characters once its text is consumed,
+                # otherwise every visited page stays in memory until close
+                page.flush_cache()
+                if hasattr(page, 'close'):  # pdfplumber >= 0.10
+                    page.close()
+    
     @staticmethod
     def extract_store_sections(pdf_path):
         """Extract store transaction sections from the PDF"""
@@ -206,66 +331,86 @@ class PDFDataExtractor:
         store_content = []
         capture_mode = False
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                lines = text.split('\n')
-                
-                for line in lines:
-                    # Look for store section headers
-                    store_header_match = re.search(r'(.*?)\s+t/a\s+-\s+(.*?)$', line)
-                    if store_header_match and "REMITTANCE" in text[:text.find(line)]:
+        for text in PDFDataExtractor.iter_page_texts(pdf_path):
+            lines = text.split('\n')
+            # Whether an earlier line on this page mentioned REMITTANCE
+            remittance_seen = False
+            
+            for line in lines:
+                # Look for store section headers; only run the regex on lines
+                # that can match it
+                if remittance_seen and 't/a' in line:
+                    store_header_match = _STORE_HEADER_PATTERN.search(line)
+                    if store_header_match:
                         if current_store and store_content:
-                            store_sections[current_store] = '\n'.join(store_content)
+                            store_sections[current_store] = store_content
                         
                         current_store = store_header_match.group(2).strip()
                         store_content = []
                         capture_mode = False
-                    
-                    # Start capturing after we see the "Date Amount Total" line
-                    if current_store and "Date Amount Total" in line:
-                        capture_mode = True
-                        continue
-                    
+                
+                if not remittance_seen and "REMITTANCE" in line:
+                    remittance_seen = True
+                
+                if not current_store:
+                    continue
+                
+                # Start capturing after we see the "Date Amount Total" line
+                if "Date Amount Total" in line:
+                    capture_mode = True
+                    continue
+                
+                if capture_mode:
                     # Stop capturing when we reach reconciling items section
-                    if current_store and "TOTAL AS PER STATEMENT" in line:
+                    if "TOTAL AS PER STATEMENT" in line:
                         capture_mode = False
-                    
-                    # Capture transaction lines when in capture mode
-                    if current_store and capture_mode:
+                    else:
                         store_content.append(line)
         
         # Add the last store
         if current_store and store_content:
-            store_sections[current_store] = '\n'.join(store_content)
+            store_sections[current_store] = store_content
         
         return store_sections
     
     @staticmethod
     def parse_store_transactions(store_name, store_content):
-        """Parse transaction data from a store's content section"""
-        transactions = []
+        """Parse transaction data from a store's content section
+        
+        store_content is the list of captured lines for the store, as
+        returned by extract_store_sections.
+        
+        Returns a dict of column lists (see _TRANSACTION_COLUMNS) rather than
+        a dict per row, which is cheaper to build and to turn into a DataFrame.
+        Amounts are returned as strings; process_single_pdf converts the
+        whole column to numbers at once.
+        """
+        dates = []
+        descriptions = []
+        amounts = []
+        running_totals = []
+        transaction_types = []
         
-        lines = store_content.split('\n')
         running_total = None
         
-        for line in lines:
+        for line in store_content:
             if not line.strip() or "Prepared by" in line or "-" == line.strip():
                 continue
 
-            # Try different patterns to match various transaction formats
-            pattern1_match = re.match(r'(\d{1,2}-\w{3}-\d{4})\s+(.*?)\s+([+-]?[\d,]+\.\d{2})\s+(\.\d{2}|\d*\.\d{2})$', line)
-            pattern2_match = re.match(r'(\d{1,2}-\w{3}-\d{4})\s+(.*?)\s+([+-]?[\d,]+\.\d{2})\s+([+-]?[\d,]+\.\d{2})$', line)
-            pattern3_match = re.match(r'(\d{1,2}-\w{3}-\d{4})\s+(.*?)\s+([+-]?[\d,]+\.\d{2})\s+(.*?)$', line)
+            # Transaction lines start with a D-MMM-YYYY or DD-MMM-YYYY date;
+            # skip the rest without running the regexes
+            if not (line[:1].isdigit() and '-' in line[1:3]):
+                continue
             
-            match = pattern1_match or pattern2_match or pattern3_match
+            # Try the strict pattern first, then the catch-all
+            match = _TRANSACTION_PATTERN.match(line) or _TRANSACTION_FALLBACK_PATTERN.match(line)
             
             if match:
-                date_str = match.group(1)
-                description = match.group(2).strip()
-                amount = match.group(3).replace(',', '')
+                date_str = match.group('date')
+                description = match.group('desc').strip()
+                amount = match.group('amount').replace(',', '')
                 
-                total_str = match.group(4).strip() if match.group(4) else None
+                total_str = match.group('total').strip() if match.group('total') else None
                 
                 if total_str:
                     if total_str.startswith('.'):
@@ -277,7 +422,8 @@ class PDFDataExtractor:
                 # Determine transaction type
                 if "Revesal" in description or "Reversal" in description:
                     transaction_type = "Reversal"
-                elif float(amount) < 0:
+                elif amount.startswith('-') and amount.strip('-0.'):
+                    # Negative and non-zero, i.e. float(amount) < 0 ('-0.00' is not)
                     transaction_type = "Credit"
                 else:
                     transaction_type = "Invoice"
@@ -292,7 +438,7 @@ class PDFDataExtractor:
                     try:
                         running_total = float(total)
                     except ValueError:
-                        numbers = re.findall(r'[+-]?[\d,]+\.\d+', total)
+                        numbers = _NUMBER_PATTERN.findall(total)
                         if numbers:
                             running_total = float(numbers[0].replace(',', ''))
                         else:
@@ -301,16 +447,20 @@ class PDFDataExtractor:
                             else:
                                 running_total = float(amount)
                 
-                transactions.append({
-                    'Store': store_name,
-                    'Date': date_str,
-                    'Description': description,
-                    'Amount': float(amount),
-                    'Running_Total': running_total if running_total is not None else float(amount),
-                    'Transaction_Type': transaction_type
-                })
+                dates.append(date_str)
+                descriptions.append(description)
+                amounts.append(amount)
+                running_totals.append(running_total if running_total is not None else float(amount))
+                transaction_types.append(transaction_type)
         
-        return transactions
+        return {
+            'Store': [store_name] * len(dates),
+            'Date': dates,
+            'Description': descriptions,
+            'Amount': amounts,
+            'Running_Total': running_totals,
+            'Transaction_Type': transaction_types
+        }
     
     @staticmethod
     def process_single_pdf(pdf_path):
@@ -321,21 +471,25 @@ class PDFDataExtractor:
             if not store_sections:
                 return None, f"No store sections found in {os.path.basename(pdf_path)}"
                 
-            all_transactions = []
+            all_transactions = {column: [] for column in _TRANSACTION_COLUMNS}
             
             for store_name, store_content in store_sections.items():
                 store_transactions = PDFDataExtractor.parse_store_transactions(store_name, store_content)
-                all_transactions.extend(store_transactions)
+                for column, values in store_transactions.items():
+                    all_transactions[column].extend(values)
             
-            if all_transactions:
-                df = pd.DataFrame(all_transactions)
+            if all_transactions['Date']:
+                df = pd.DataFrame.from_dict(all_transactions)
                 
                 column_order = ['Store', 'Date', 'Transaction_Type', 'Description', 'Amount']
                 df = df[column_order]
+                df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
                 
-                df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%Y', errors='coerce')
-                df = df.sort_values(['Store', 'Date'])
-                df['Date'] = df['Date'].dt.strftime('%d-%b-%Y')
+                # Sort on parsed dates but keep the original date strings,
+                # saving a strftime pass to turn them back into text
+                sort_key = pd.to_datetime(df['Date'], format='%d-%b-%Y', errors='coerce')
+                order = pd.DataFrame({'Store': df['Store'], 'Date': sort_key}).sort_values(['Store', 'Date']).index
+                df = df.loc[order]
                 
                 return df, None
             else:
@@ -343,6 +497,62 @@ class PDFDataExtractor:
                 
         except Exception as e:
             return None, f"Error processing {os.path.basename(pdf_path)}: {str(e)}"
+    
+    @staticmethod
+    def iter_processed_pdfs(pdf_paths, max_workers=None):
+        """Process PDFs in worker processes, yielding (pdf_path, df, error_msg) in input order"""
+        max_workers = min(max_workers or os.cpu_count() or 1, len(pdf_paths))
+        if sys.platform == 'win32':
+            # ProcessPoolExecutor rejects more than 61 workers on Windows
+            max_workers = min(max_workers, 61)
+        
+        # Not worth spawning worker processes for a single PDF
+        if max_workers <= 1:
+            for pdf_path in pdf_paths:
+                yield (pdf_path,) + PDFDataExtractor.process_single_pdf(pdf_path)
+            return
+        
+        # Parsing is CPU-bound, so fan out across processes. Keep at most
+        # 2 * max_workers results in flight to bound memory on large batches.
+        max_pending = 2 * max_workers
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            path_iter = iter(pdf_paths)
+            
+            def submit(pdf_path):
+                try:
+                    future = executor.submit(PDFDataExtractor.process_single_pdf, pdf_path)
+                except Exception as e:
+                    # The pool is broken (a worker died); fail just this file
+                    future = Future()
+                    future.set_exception(e)
+                return pdf_path, future
+            
+            # Leave one slot free; the loop below fills it before each wait
+            for pdf_path in path_iter:
+                pending.append(submit(pdf_path))
+                if len(pending) >= max_pending - 1:
+                    break
+            
+            while pending:
+                next_path = next(path_iter, None)
+                if next_path is not None:
+                    pending.append(submit(next_path))
+                
+                # Pop the future inside the yield so neither it nor the frame it
+                # holds stays referenced here while the caller writes the frame
+                pdf_path = pending[0][0]
+                yield (pdf_path,) + PDFDataExtractor.collect_result(pending.popleft())
+    
+    @staticmethod
+    def collect_result(pending_pdf):
+        """Return (df, error_msg) for a (pdf_path, future) pair"""
+        pdf_path, future = pending_pdf
+        try:
+            return future.result()
+        except Exception as e:
+            # e.g. BrokenProcessPool when a worker crashes in native code
+            return None, f"Error processing {os.path.basename(pdf_path)}: {str(e)}"
 
 class IntegratedApp(ctk.CTk):
     def __init__(self):
@@ -719,23 +929,138 @@ class IntegratedApp(ctk.CTk):
             error_msg = f"An error occurred during processing: {str(e)}"
             self.after(0, lambda: self.process_complete(False, error_msg))
     
+    @staticmethod
+    def can_stream_sheets(sheet_count):
+        """Return True if one open file per worksheet fits the open file limit"""
+        needed = sheet_count + _FD_HEADROOM
+        try:
+            import resource
+        except ImportError:
+            return needed <= _WINDOWS_FD_LIMIT
+        
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            # Raise the soft limit only as far as needed; macOS rejects values
+            # above OPEN_MAX even when the hard limit is unlimited
+            target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+                soft = target
+            except (ValueError, OSError):
+                pass
+        return soft == resource.RLIM_INFINITY or soft >= needed
+    
+    @staticmethod
+    def get_excel_engine(sheet_count):
+        """Return the ExcelWriter engine and its options, preferring xlsxwriter"""
+        # Both engines can stream rows to disk instead of keeping every cell
+        # of the workbook in memory, but need an open file per sheet for it;
+        # too many sheets for the open file limit are kept in memory instead
+        streaming = IntegratedApp.can_stream_sheets(sheet_count)
+        
+        if importlib.util.find_spec('xlsxwriter') is None:
+            return 'openpyxl', {'write_only': streaming}
+        
+        # constant_memory flushes each row as soon as the next one starts,
+        # so worksheets must be filled row by row (to_excel goes by column)
+        return 'xlsxwriter', {'options': {'constant_memory': streaming}}
+    
+    @staticmethod
+    def create_header_format(writer):
+        """Return the header style to_excel applies, for the writer's engine"""
+        if writer.engine == 'openpyxl':
+            from openpyxl.styles import Alignment, Border, Font, Side
+            side = Side(style='thin')
+            return {
+                'font': Font(bold=True),
+                'border': Border(left=side, right=side, top=side, bottom=side),
+                'alignment': Alignment(horizontal='center', vertical='top'),
+            }
+        
+        return writer.book.add_format(
+            {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+        )
+    
+    @staticmethod
+    def add_worksheet(writer, sheet_name):
+        """Append a new, empty worksheet to the writer's workbook"""
+        if writer.engine == 'openpyxl':
+            return writer.book.create_sheet(sheet_name)
+        return writer.book.add_worksheet(sheet_name)
+    
+    @staticmethod
+    def write_worksheet(writer, worksheet, columns, rows, header_format):
+        """Write a header and rows to an empty worksheet one row at a time"""
+        if writer.engine == 'openpyxl':
+            from openpyxl.cell import WriteOnlyCell
+            header = []
+            for column in columns:
+                cell = WriteOnlyCell(worksheet, value=column)
+                for attribute, style in header_format.items():
+                    setattr(cell, attribute, style)
+                header.append(cell)
+            worksheet.append(header)
+            for record in rows:
+                worksheet.append(record)
+            return
+        
+        worksheet.write_row(0, 0, columns, header_format)
+        for row, record in enumerate(rows, 1):
+            worksheet.write_row(row, 0, record)
+    
+    @staticmethod
+    def dataframe_rows(df):
+        """Return the rows of a DataFrame as plain tuples"""
+        # Blank out NaN like to_excel does; neither engine can store NaN.
+        # Only copy the frame when there is NaN to replace.
+        if df.isna().values.any():
+            df = df.astype(object).where(df.notna(), None)
+        return df.itertuples(index=False, name=None)
+    
     def process_pdfs_to_excel(self, pdf_paths, output_path):
         """Process extracted PDFs and create Excel file"""
         try:
             total_pdfs = len(pdf_paths)
             processed_count = 0
+            self._total_transactions = 0
             
-            with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+            if total_pdfs == 0:
+                self.update_status("No PDF files were successfully processed.")
+                return False
+            
+            # One sheet per PDF plus the Summary
+            engine, engine_kwargs = self.get_excel_engine(total_pdfs + 1)
+            with pd.ExcelWriter(output_path, engine=engine, engine_kwargs=engine_kwargs) as writer:
+                header_format = self.create_header_format(writer)
+                # Add the Summary sheet first so the workbook opens on it; it is
+                # filled in once all PDFs are processed. Both streaming engines
+                # flush rows per sheet, so writing it last is still fine.
+                summary_worksheet = self.add_worksheet(writer, 'Summary')
                 successful_files = []
                 failed_files = []
+                # Lowercased names of the sheets so far; Excel rejects names
+                # that differ only in case
+                used_names = {'summary'}
+                
+                # Each GUI update redraws the window, so report at most every
+                # 50 ms (and always for the last PDF) rather than once per PDF
+                last_update = None
                 
-                for i, pdf_path in enumerate(pdf_paths):
+                results = PDFDataExtractor.iter_processed_pdfs(pdf_paths)
+                # No enumerate(): it keeps the last item, and so the last frame,
+                # referenced until the next one arrives
+                for pdf_path, df, error_msg in results:
+                    processed_count += 1
                     filename = os.path.basename(pdf_path)
-                    self.update_status(f"Processing PDF {i+1}/{total_pdfs}: {filename}")
-                    
-                    df, error_msg = PDFDataExtractor.process_single_pdf(pdf_path)
+                    now = time.monotonic()
+                    report = last_update is None or now - last_update >= 0.05 or processed_count == total_pdfs
+                    if report:
+                        last_update = now
+                        self.update_status(f"Processed PDF {processed_count}/{total_pdfs}: {filename}")
                     
-                    if df is not None:
+                    # A frame without rows would only add an empty sheet
+                    n = len(df) if df is not None else 0
+                    if n:
                         # Create worksheet name
                         worksheet_name = os.path.splitext(filename)[0]
                         worksheet_name = worksheet_name[:31]
@@ -747,53 +1072,49 @@ class IntegratedApp(ctk.CTk):
                         
                         # Ensure unique worksheet name
                         original_name = worksheet_name
+                        short_name = original_name[:27]
                         counter = 1
-                        while worksheet_name in [sheet[0] for sheet in successful_files]:
+                        while worksheet_name.lower() in used_names:
                             worksheet_name = f"{original_name}_{counter}"
                             if len(worksheet_name) > 31:
-                                worksheet_name = f"{original_name[:27]}_{counter}"
+                                worksheet_name = f"{short_name}_{counter}"
                             counter += 1
                         
-                        df.to_excel(writer, sheet_name=worksheet_name, index=False)
-                        successful_files.append((worksheet_name, len(df), filename))
+                        worksheet = self.add_worksheet(writer, worksheet_name)
+                        self.write_worksheet(writer, worksheet, list(df.columns),
+                                             self.dataframe_rows(df), header_format)
+                        # Free the frame now instead of when the next result
+                        # rebinds df, so only one is held at a time
+                        del df
+                        used_names.add(worksheet_name.lower())
+                        successful_files.append((worksheet_name, n, filename))
+                        self._total_transactions += n
                         
                     else:
-                        failed_files.append((filename, error_msg))
+                        failed_files.append((filename, error_msg or f"No transactions found in {filename}"))
                     
-                    processed_count += 1
-                    progress = 50 + (processed_count / total_pdfs) * 40
-                    self.update_progress(progress)
+                    if report:
+                        progress = 50 + (processed_count / total_pdfs) * 40
+                        self.update_progress(progress)
                 
-                # Add summary worksheet
-                if successful_files or failed_files:
-                    summary_data = []
-                    
-                    for worksheet_name, transaction_count, filename in successful_files:
-                        summary_data.append({
-                            'Filename': filename,
-                            'Status': 'Success',
-                            'Worksheet': worksheet_name,
-                            'Transactions': transaction_count,
-                            'Notes': f'{transaction_count} transactions extracted'
-                        })
-                    
-                    for filename, error_msg in failed_files:
-                        summary_data.append({
-                            'Filename': filename,
-                            'Status': 'Failed',
-                            'Worksheet': 'N/A',
-                            'Transactions': 0,
-                            'Notes': error_msg
-                        })
-                    
-                    if summary_data:
-                        summary_df = pd.DataFrame(summary_data)
-                        summary_df.to_excel(writer, sheet_name='Summary', index=False)
+                # Fill in the summary worksheet; every PDF ended up in one of the
+                # two lists, so it is never empty
+                summary_rows = chain(
+                    ((filename, 'Success', worksheet_name, transaction_count,
+                      f'{transaction_count} transactions extracted')
+                     for worksheet_name, transaction_count, filename in successful_files),
+                    ((filename, 'Failed', 'N/A', 0, error_msg)
+                     for filename, error_msg in failed_files),
+                )
+                self.write_worksheet(
+                    writer, summary_worksheet,
+                    ['Filename', 'Status', 'Worksheet', 'Transactions', 'Notes'],
+                    summary_rows, header_format
+                )
             
             self.update_progress(100)
             
             if successful_files:
-                self._total_transactions = sum(count for _, count, _ in successful_files)
                 self.update_status(f"Excel file created successfully with {len(successful_files)} worksheets!")
                 return True
             else:
@@ -805,5 +1126,7 @@ class IntegratedApp(ctk.CTk):
             return False
 
 if __name__ == "__main__":
+    # Required for ProcessPoolExecutor workers in the frozen executable
+    multiprocessing.freeze_support()
     app = IntegratedApp()
     app.mainloop()